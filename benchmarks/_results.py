@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""Shared helpers for saving benchmark results and comparing them to a baseline."""
+
+import json
+import platform
+import sys
+import time
+
+
+def save_results(path, kind, results):
+    payload = {
+        'kind': kind,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as outfile:
+        json.dump(payload, outfile, indent=2, sort_keys=True)
+
+
+def compare_results(results, baseline_path, metric, *, higher_is_better=False, threshold=0.1):
+    """Print each result against the baseline and return the names that regressed."""
+    with open(baseline_path, 'r', encoding='utf-8') as infile:
+        baseline = json.load(infile)['results']
+
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            print(f'{name:<48} (no baseline)')
+            continue
+
+        before, after = baseline[name][metric], result[metric]
+        change = (after - before) / before if before else 0.0
+        regressed = change < -threshold if higher_is_better else change > threshold
+        if regressed:
+            regressions.append(name)
+
+        print(f'{name:<48} {before:>12.6g} -> {after:>12.6g} {change:>+8.1%}'
+              f'{"  REGRESSION" if regressed else ""}')
+
+    return regressions
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmarks for the flask-quickstart hot paths.
+
+    python benchmarks/bench.py --output results.json
+    python benchmarks/bench.py --baseline results.json --filter cache
+
+Each benchmark reports the best and median seconds per call over several repeats.
+"""
+
+import argparse
+import dataclasses
+import datetime
+import enum
+import itertools
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import timeit
+import uuid
+
+from _results import compare_results, save_results
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_quickstart import create_app  # noqa: E402  pylint: disable=wrong-import-position
+from flask_quickstart.decorators import memoize  # noqa: E402  pylint: disable=wrong-import-position
+from flask_quickstart.decorators.cache import Cache, TTLFileCache  # noqa: E402  pylint: disable=wrong-import-position
+from flask_quickstart.lib.json import ExtendedEncoder  # noqa: E402  pylint: disable=wrong-import-position
+
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a setup function, which returns `(callable, cleanup)` for the timed call."""
+
+    def decorator(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return decorator
+
+
+def _quiet_app():
+    # create_app logs every missing optional dependency, which would swamp the output
+    logging.disable(logging.CRITICAL)
+    try:
+        return create_app('benchmark')
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+@benchmark('create_app.cold_start')
+def bench_create_app():
+    return _quiet_app, None
+
+
+@benchmark('cache.make_key')
+def bench_make_key():
+    def func(a, b, c=None):
+        return a, b, c
+
+    return (lambda: Cache.make_key(func, 1, 'two', c={'three': [3]})), None
+
+
+def _memoize_setup(hit):
+    app = _quiet_app()
+    ctx = app.app_context()
+    ctx.push()
+
+    @memoize()
+    def func(value):
+        return {'value': value}
+
+    if hit:
+        func(1)
+        call = lambda: func(1)  # noqa: E731
+    else:
+        counter = itertools.count()
+        call = lambda: func(next(counter))  # noqa: E731
+
+    return call, ctx.pop
+
+
+@benchmark('memoize.hit')
+def bench_memoize_hit():
+    return _memoize_setup(hit=True)
+
+
+@benchmark('memoize.miss')
+def bench_memoize_miss():
+    return _memoize_setup(hit=False)
+
+
+def _ttl_file_cache_setup(entries, size, operation):
+    tmpdir = tempfile.TemporaryDirectory()
+    cache = TTLFileCache(tmpdir.name, prefix='bench', default_ttl=900)
+    data = {'payload': 'x' * size}
+    keys = [Cache._make_key(i) for i in range(entries)]  # pylint: disable=protected-access
+    for key in keys:
+        cache.save(key, data)
+
+    cycle = itertools.cycle(keys)
+    if operation == 'load':
+        call = lambda: cache.load(next(cycle))  # noqa: E731
+    else:
+        call = lambda: cache.save(next(cycle), data)  # noqa: E731
+
+    return call, tmpdir.cleanup
+
+
+for _entries, _size, _operation in itertools.product(
+        (10, 1000), (100, 10000, 100000), ('load', 'save'),
+):
+    benchmark(f'ttl_file_cache.{_operation}[entries={_entries},size={_size}]')(
+        lambda entries=_entries, size=_size, operation=_operation: _ttl_file_cache_setup(
+            entries, size, operation,
+        )
+    )
+
+
+class _Colour(enum.Enum):
+    RED = 'red'
+
+
+@dataclasses.dataclass
+class _Record:
+    name: str
+    tags: set
+
+
+@benchmark('json.extended_encoder')
+def bench_extended_encoder():
+    payload = [
+        {
+            'id': uuid.UUID(int=i),
+            'when': datetime.datetime(2020, 1, 1) + datetime.timedelta(minutes=i),
+            'duration': datetime.timedelta(seconds=i),
+            'colour': _Colour.RED,
+            'record': _Record(name=f'record-{i}', tags={'a'}),
+        }
+        for i in range(100)
+    ]
+    encoder = ExtendedEncoder()
+    return (lambda: encoder.encode(payload)), None
+
+
+def _cors_setup(match):
+    try:
+        from flask_cors.core import try_match_any_pattern  # pylint: disable=import-outside-toplevel
+        from flask_quickstart.factory import origins_list_to_regex  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+
+    origins = ['example.com', 'www.example.com', r'.*\.example\.org', 'http://localhost:5000']
+    if not match:
+        return (lambda: origins_list_to_regex(origins)), None
+
+    logging.disable(logging.INFO)
+    patterns = origins_list_to_regex(origins)
+    logging.disable(logging.NOTSET)
+    return (
+        lambda: try_match_any_pattern('https://api.example.org', patterns, caseSensitive=False)
+    ), None
+
+
+@benchmark('cors.origins_list_to_regex')
+def bench_origins_list_to_regex():
+    return _cors_setup(match=False)
+
+
+@benchmark('cors.match')
+def bench_cors_match():
+    return _cors_setup(match=True)
+
+
+def run_benchmark(name, setup, *, repeat):
+    prepared = setup()
+    if prepared is None:
+        print(f'{name:<48} skipped, missing optional dependency')
+        return None
+
+    call, cleanup = prepared
+    try:
+        timer = timeit.Timer(call)
+        number, _ = timer.autorange()
+        timings = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+    finally:
+        if cleanup is not None:
+            cleanup()
+
+    result = {
+        'best': min(timings),
+        'median': statistics.median(timings),
+        'number': number,
+        'repeat': repeat,
+    }
+    print(
+        f'{name:<48} best {result["best"] * 1e6:>12.2f}us  '
+        f'median {result["median"] * 1e6:>12.2f}us'
+    )
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against a previously saved JSON file')
+    parser.add_argument('--filter', default='', help='Only run benchmarks containing this string')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--threshold', type=float, default=0.1, help='Allowed slowdown ratio')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if args.filter in name:
+            result = run_benchmark(name, setup, repeat=args.repeat)
+            if result is not None:
+                results[name] = result
+
+    if args.output:
+        save_results(args.output, 'bench', results)
+
+    if args.baseline:
+        print()
+        if compare_results(results, args.baseline, 'best', threshold=args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Load test an app built by `create_app` under a local threaded WSGI server.
+
+    python benchmarks/loadtest.py --duration 10 --concurrency 16 --output load.json
+    python benchmarks/loadtest.py --app myapp:app --path /api/things --baseline load.json
+
+Reports throughput and p50/p90/p99 latency of successful (2xx/3xx) responses for each path;
+anything else is counted as an error, with every status code recorded in the results.
+"""
+
+import argparse
+import http.client
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+
+from collections import Counter
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from _results import compare_results, save_results
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import jsonify  # noqa: E402  pylint: disable=wrong-import-position
+from werkzeug.utils import import_string  # noqa: E402  pylint: disable=wrong-import-position
+
+from flask_quickstart import create_app  # noqa: E402  pylint: disable=wrong-import-position
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def build_default_app():
+    logging.disable(logging.CRITICAL)
+    try:
+        app = create_app('loadtest')
+    finally:
+        logging.disable(logging.NOTSET)
+
+    @app.route('/ping')
+    def ping():
+        return 'pong'
+
+    @app.route('/json/<date:day>')
+    def json_view(day):
+        return jsonify({'day': day, 'items': list(range(50))})
+
+    return app
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _client(host, port, path, deadline, latencies, statuses):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            status = str(response.status)
+        except OSError as exc:
+            status = type(exc).__name__
+
+        statuses.append(status)
+        if status[0] in '23':
+            latencies.append(time.perf_counter() - started)
+
+
+def run_path(host, port, path, *, duration, concurrency, warmup):
+    if warmup:
+        _client(host, port, path, time.perf_counter() + warmup, [], [])
+
+    latencies, statuses = [], []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=_client, args=(host, port, path, deadline, latencies, statuses))
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return {
+        'requests': len(statuses),
+        'errors': len(statuses) - len(ordered),
+        'statuses': dict(Counter(statuses)),
+        'throughput': len(ordered) / elapsed,
+        'p50': percentile(ordered, 0.50),
+        'p90': percentile(ordered, 0.90),
+        'p99': percentile(ordered, 0.99),
+        'mean': statistics.fmean(ordered) if ordered else 0.0,
+        'concurrency': concurrency,
+        'duration': elapsed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--app', help='Import path of a Flask app, defaults to a create_app demo')
+    parser.add_argument('--path', action='append', help='Path to request, may be repeated')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per path')
+    parser.add_argument('--warmup', type=float, default=1.0, help='Seconds of warmup per path')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against a previously saved JSON file')
+    parser.add_argument(
+        '--threshold', type=float, default=0.1,
+        help='Allowed throughput drop or latency increase ratio',
+    )
+    args = parser.parse_args(argv)
+
+    app = import_string(args.app) if args.app else build_default_app()
+    paths = args.path or ['/ping', '/json/2020-01-01']
+
+    server = make_server(
+        '127.0.0.1', 0, app, server_class=_ThreadingWSGIServer, handler_class=_QuietHandler,
+    )
+    host, port = server.server_address
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+
+    results = {}
+    try:
+        for path in paths:
+            result = run_path(
+                host, port, path,
+                duration=args.duration, concurrency=args.concurrency, warmup=args.warmup,
+            )
+            results[path] = result
+            print(
+                f'{path:<32} {result["throughput"]:>9.1f} req/s  '
+                f'p50 {result["p50"] * 1000:>7.2f}ms  p99 {result["p99"] * 1000:>7.2f}ms  '
+                f'errors {result["errors"]}'
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    if args.output:
+        save_results(args.output, 'loadtest', results)
+
+    if args.baseline:
+        regressed = False
+        for metric, higher_is_better in (('throughput', True), ('p50', False), ('p99', False)):
+            print(f'\n{metric}:')
+            regressed |= bool(compare_results(
+                results, args.baseline, metric,
+                higher_is_better=higher_is_better, threshold=args.threshold,
+            ))
+        if regressed:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
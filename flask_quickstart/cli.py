@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import click
+
+from flask import current_app
+from flask.cli import AppGroup
+from werkzeug.utils import import_string
+
+from .decorators.cache import SharedMemoryCache, TTLFileCache
+
+
+# Only these backends outlive the CLI process, so warming anything else would be thrown away
+SHARED_BACKENDS = (SharedMemoryCache, TTLFileCache)
+
+
+cache_cli = AppGroup('cache', help='Manage memoized function caches.')
+
+
+def _warm_batch(app, func, calls, force):
+    with app.app_context():
+        return func.cache_warm(calls, force=force)
+
+
+@cache_cli.command('warm')
+@click.option('--workers', default=4, show_default=True, help='Number of concurrent warmers.')
+@click.option('--batch-size', default=50, show_default=True, help='Calls per cache_warm batch.')
+@click.option('--force', is_flag=True, help='Recompute entries that are already cached.')
+def warm_cache(workers, batch_size, force):
+    """
+    Precompute memoized entries listed in the CACHE_WARM config.
+
+    CACHE_WARM is a list of `{"function": "package.module:func", "calls": [...]}` entries, where
+    each call is a list of positional args or `{"args": [...], "kwargs": {...}}`. Functions whose
+    cache only lives in this process are skipped, as workers would never see the entries.
+    """
+
+    app = current_app._get_current_object()  # pylint: disable=protected-access
+    entries = app.config.get('CACHE_WARM') or []
+
+    jobs = []
+    skipped = []
+    for entry in entries:
+        func = import_string(entry['function'])
+        if not hasattr(func, 'cache_warm'):
+            raise click.ClickException(f'{entry["function"]} is not a memoized function')
+
+        try:
+            backend = func.cache_backend()
+        except ValueError as exc:
+            backend = exc
+
+        if not isinstance(backend, SHARED_BACKENDS):
+            skipped.append(entry['function'])
+            reason = (
+                f'its cache could not be created: {backend}' if isinstance(backend, Exception)
+                else f'{type(backend).__name__} only lives in this process'
+            )
+            click.echo(f'Skipping {entry["function"]}, {reason}', err=True)
+            continue
+
+        calls = list(entry.get('calls') or [])
+        for start in range(0, len(calls), batch_size):
+            jobs.append((entry['function'], func, calls[start:start + batch_size]))
+
+    warmed = 0
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_warm_batch, app, func, calls, force): name
+            for name, func, calls in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                warmed += future.result()
+            except Exception as exc:  # pylint: disable=broad-except
+                failed += 1
+                app.logger.exception(exc)
+                click.echo(f'Failed warming {futures[future]}: {exc}', err=True)
+
+    click.echo(f'Warmed {warmed} cache entries across {len(entries) - len(skipped)} functions')
+    if failed:
+        raise click.ClickException(f'{failed} batches failed to warm')
+    if skipped:
+        raise click.ClickException(f'{len(skipped)} functions were not warmed')
@@ -1,3 +1,3 @@
 
-from .date import DateConverter
+from .date import DateConverter, DateRangeConverter
 from .enum import setup_enum_converter
@@ -1,8 +1,15 @@
 
-from datetime import datetime
+from datetime import date
+from functools import lru_cache
+
 from werkzeug.routing import BaseConverter, ValidationError
 
 
+@lru_cache(maxsize=1024)
+def _parse_date(value):
+    return date.fromisoformat(value)
+
+
 class DateConverter(BaseConverter):
     """Extracts a ISO8601 date from the path and validates it."""
 
@@ -10,9 +17,31 @@ class DateConverter(BaseConverter):
 
     def to_python(self, value):
         try:
-            return datetime.strptime(value, '%Y-%m-%d').date()
+            return _parse_date(value)
         except ValueError:
             raise ValidationError()
 
     def to_url(self, value):
         return value.strftime('%Y-%m-%d')
+
+
+class DateRangeConverter(BaseConverter):
+    """Extracts an inclusive `start..end` range of ISO8601 dates from the path and validates it."""
+
+    regex = r'\d{4}-\d{2}-\d{2}\.\.\d{4}-\d{2}-\d{2}'
+
+    def to_python(self, value):
+        start, _, end = value.partition('..')
+        try:
+            start, end = _parse_date(start), _parse_date(end)
+        except ValueError:
+            raise ValidationError()
+
+        if start > end:
+            raise ValidationError()
+
+        return (start, end)
+
+    def to_url(self, value):
+        start, end = value
+        return f"{start.strftime('%Y-%m-%d')}..{end.strftime('%Y-%m-%d')}"
@@ -1,19 +1,30 @@
 
-from enum import Enum, EnumMeta
+import re
+
+from enum import Enum
 
 from werkzeug.routing import BaseConverter, ValidationError
 
 
 def setup_enum_converter(enum_to_convert):
 
-    if not isinstance(enum_to_convert, (Enum, EnumMeta,)):
-        raise ValueError(f'{enum_to_convert.__name__} is not an Enum')
+    if not isinstance(enum_to_convert, type) or not issubclass(enum_to_convert, Enum):
+        raise ValueError(f'{getattr(enum_to_convert, "__name__", enum_to_convert)} is not an Enum')
+
+    members = dict(enum_to_convert.__members__)
+    if not members:
+        raise ValueError(f'{enum_to_convert.__name__} has no members')
+
+    # Longest names first, so one member name that prefixes another can't shadow it
+    names = sorted(members, key=len, reverse=True)
 
     class ConfiguredEnumConverter(BaseConverter):
+        regex = '(?:' + '|'.join(re.escape(name) for name in names) + ')'
+
         def to_python(self, value):
             try:
-                return enum_to_convert[value]
-            except (AttributeError, KeyError, IndexError, ValueError) as exc:
+                return members[value]
+            except KeyError as exc:
                 raise ValidationError from exc
 
         def to_url(self, obj):
@@ -1,25 +1,93 @@
 
+import asyncio
+import inspect
+
 from functools import wraps
 
-from flask import current_app
+from flask import current_app, has_request_context
+
+try:
+    from sentry_sdk import capture_exception
+except ImportError:
+    def capture_exception(exc):  # pylint: disable=unused-argument
+        return None
+
+from ..lib.offload import offload
+from .cache import Cache, RequestCache, SharedMemoryCache, TTLFileCache
+
+
+__all__ = [
+    'Cache',
+    'RequestCache',
+    'SharedMemoryCache',
+    'TTLFileCache',
+    'memoize',
+    'offload',
+    'request_memoize',
+    'ttl_memoize',
+]
+
 
-from .cache import Cache, TTLFileCache
+_MISSING = object()
 
 
-def memoize(force_refresh_callable=None):
+class _Pending:
+    """Marks a request memoized coroutine that is still running, so callers await its task."""
+
+    def __init__(self, task):
+        self.task = task
+
+
+def _split_call(call):
+    """Normalise a warm-up entry into `(args, kwargs)`.
+
+    Entries are either `{"args": [...], "kwargs": {...}}` (both keys optional), a list/tuple of
+    positional args or a single positional arg. Wrap a lone dict arg as `{"args": [{...}]}`.
+    """
+    if isinstance(call, dict):
+        unknown = set(call) - {'args', 'kwargs'}
+        if unknown:
+            raise ValueError(
+                f'Warm-up calls given as a dict only take "args" and "kwargs", not {sorted(unknown)}'
+            )
+        return tuple(call.get('args') or ()), dict(call.get('kwargs') or {})
+    if isinstance(call, (list, tuple)):
+        return tuple(call), {}
+    return (call,), {}
+
+
+def memoize(force_refresh_callable=None, *, cache=None):
     """
     Simple decorator to cache return value based on args and kwargs in-memory.
 
+    Pass a `cache` instance (e.g. a `SharedMemoryCache`) to use it instead of a per-process dict.
+    Keys in a passed cache include the function's module and qualified name, so several
+    functions can share one cache without returning each other's results.
+    The decorated function gains `cache_warm(calls)` to precompute a batch of entries and
+    `cache_backend()` to get the cache it uses.
+
     Taken and modified from Python Decorator Library.
     https://wiki.python.org/moin/PythonDecoratorLibrary#Alternate_memoize_as_dict_subclass
 
     """
 
     def decorator(obj):
+        namespace = f'{obj.__module__}.{obj.__qualname__}'
+
+        def get_cache():
+            if getattr(obj, 'cache', None) is None:
+                obj.cache = cache if cache is not None else Cache()
+            return obj.cache
+
+        def make_index(*args, **kwargs):
+            index = obj.cache.make_key(obj, *args, **kwargs)
+            if cache is None:
+                return index
+            return Cache._make_key(namespace, index)  # pylint: disable=protected-access
+
         @wraps(obj)
         def memoizer(*args, **kwargs):
-            if not obj.cache:
-                obj.cache = Cache()
+            get_cache()
 
             force_refresh = False
             if force_refresh_callable is not None:
@@ -34,7 +102,7 @@ def memoize(force_refresh_callable=None):
                     )
                     force_refresh = force_refresh_callable
 
-            index = obj.cache.make_key(obj, *argscopy, **kwargs)
+            index = make_index(*args, **kwargs)
             data = obj.cache.load(index)
 
             if not data or force_refresh:
@@ -47,6 +115,23 @@ def memoize(force_refresh_callable=None):
 
             return data
 
+        def cache_warm(calls, *, force=False):
+            cache_ = get_cache()
+            calls = {
+                make_index(*args, **kwargs): (args, kwargs)
+                for args, kwargs in map(_split_call, calls)
+            }
+            if not force:
+                cached = cache_.get_many(calls.keys())
+                calls = {index: call for index, call in calls.items() if not cached.get(index)}
+
+            cache_.set_many({
+                index: obj(*args, **kwargs) for index, (args, kwargs) in calls.items()
+            })
+            return len(calls)
+
+        memoizer.cache_warm = cache_warm
+        memoizer.cache_backend = get_cache
         return memoizer
 
     return decorator
@@ -55,9 +140,21 @@ def memoize(force_refresh_callable=None):
 def ttl_memoize(force_refresh_callable=None, *, default_ttl=None):
     """
     Decorator to cache return values on the file system
+
+    The decorated function gains `cache_warm(calls)` to precompute a batch of entries and
+    `cache_backend()` to get the cache it uses.
     """
 
     def decorator(obj):
+        def get_cache():
+            if getattr(obj, 'cache', None) is None:
+                obj.cache = TTLFileCache(
+                    current_app.config.get("CACHE_STORAGE_FOLDER"),
+                    prefix=obj.__name__,
+                    default_ttl=default_ttl or current_app.config.get("CACHE_TTL"),
+                )
+            return obj.cache
+
         @wraps(obj)
         def wrapper(*args, **kwargs):
             if not current_app.config.get("CACHE_STORAGE_FOLDER"):
@@ -66,14 +163,9 @@ def ttl_memoize(force_refresh_callable=None, *, default_ttl=None):
                 )
                 return obj(*args, **kwargs)
 
-            if not obj.cache:
-                obj.cache = TTLFileCache(
-                    current_app.config.CACHE_STORAGE_FOLDER,
-                    prefix=obj.__name__,
-                    default_ttl=default_ttl or current_app.config.get("CACHE_TTL"),
-                )
+            get_cache()
 
-            index = obj.cache.make_key(obj, *argscopy, **kwargs)
+            index = obj.cache.make_key(obj, *args, **kwargs)
             current_app.logger.debug("Cache key is: %s" % index)
 
             data, expires_at, force_refresh = obj.cache.load(index)
@@ -123,6 +215,8 @@ def ttl_memoize(force_refresh_callable=None, *, default_ttl=None):
                     )
                     obj.cache.delete(index)
 
+                data = newdata
+
             else:
                 current_app.logger.debug(
                     "Serving response from the cache, expires at: %s" % expires_at
@@ -130,6 +224,96 @@ def ttl_memoize(force_refresh_callable=None, *, default_ttl=None):
 
             return data
 
+        def cache_warm(calls, *, force=False):
+            if not current_app.config.get("CACHE_STORAGE_FOLDER"):
+                current_app.logger.warning(
+                    "Not warming %s, due to missing CACHE_STORAGE_FOLDER config", obj.__name__
+                )
+                return 0
+
+            cache_ = get_cache()
+            calls = {
+                cache_.make_key(obj, *args, **kwargs): (args, kwargs)
+                for args, kwargs in map(_split_call, calls)
+            }
+            if not force:
+                cached = cache_.get_many(calls.keys())
+                calls = {
+                    index: call for index, call in calls.items()
+                    if not cached[index][0] or cached[index][2]
+                }
+
+            results = {index: obj(*args, **kwargs) for index, (args, kwargs) in calls.items()}
+            # Empty results are never cached, so they don't count as warmed
+            stored = {index: data for index, data in results.items() if data}
+            if not stored or not cache_.set_many(stored):
+                return 0
+            return len(stored)
+
+        wrapper.cache_warm = cache_warm
+        wrapper.cache_backend = get_cache
         return wrapper
 
     return decorator
+
+
+def request_memoize(obj):
+    """
+    Decorator to cache return values for the lifetime of the current request only.
+
+    Results are stored on `flask.g` and dropped at request teardown, so nothing leaks between
+    requests. Outside of a request context the underlying function is always called. Concurrent
+    calls to a coroutine function with the same arguments share a single running task.
+
+    """
+
+    cache = RequestCache(f'{obj.__module__}.{obj.__qualname__}')
+
+    if inspect.iscoroutinefunction(obj):
+
+        @wraps(obj)
+        async def async_memoizer(*args, **kwargs):
+            if not has_request_context():
+                return await obj(*args, **kwargs)
+
+            index = cache.make_key(obj, *args, **kwargs)
+            data = cache.load(index, _MISSING)
+            if isinstance(data, _Pending):
+                # Shielded so one caller being cancelled doesn't cancel the shared task
+                return await asyncio.shield(data.task)
+
+            if data is _MISSING:
+                current_app.logger.debug("Calling underlying request memoized function")
+                task = asyncio.ensure_future(obj(*args, **kwargs))
+                cache.save(index, _Pending(task))
+                try:
+                    data = await asyncio.shield(task)
+                except BaseException:
+                    # A failed task is forgotten so it can be retried; if only this caller was
+                    # cancelled the task keeps running for anyone else awaiting it
+                    if task.done():
+                        cache.delete(index)
+                    raise
+                cache.save(index, data)
+
+            return data
+
+        async_memoizer.cache = cache
+        return async_memoizer
+
+    @wraps(obj)
+    def memoizer(*args, **kwargs):
+        if not has_request_context():
+            return obj(*args, **kwargs)
+
+        index = cache.make_key(obj, *args, **kwargs)
+        data = cache.load(index, _MISSING)
+        if data is _MISSING:
+            current_app.logger.debug("Calling underlying request memoized function")
+            data = obj(*args, **kwargs)
+            cache.save(index, data)
+
+        return data
+
+    memoizer.cache = cache
+    return memoizer
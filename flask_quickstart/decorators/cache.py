@@ -2,11 +2,18 @@
 import inspect
 import json
 import logging
+import mmap
 import os
+import shutil
+import struct
+import threading
+import time
 
 from datetime import timedelta, datetime
 from hashlib import sha1
 
+from flask import g
+
 from ..lib.json import ExtendedEncoder
 
 
@@ -27,7 +34,7 @@ class Cache:
 
     @classmethod
     def _is_method(cls, func):
-        spec = inspect.getargspec(func)
+        spec = inspect.getfullargspec(func)
         return spec.args and spec.args[0] in ["self", "cls"]
 
     @classmethod
@@ -53,6 +60,37 @@ class Cache:
         self._data.update({index: data})
         return True
 
+    def get_many(self, indexes):
+        return {index: self.load(index) for index in indexes}
+
+    def set_many(self, mapping):
+        self._data.update(mapping)
+        return True
+
+
+class RequestCache(Cache):
+    """In-memory cache whose entries live on the active request's `g` and die with it."""
+
+    g_attribute = '_request_cache_data'
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+
+    @property
+    def _data(self):
+        store = g.setdefault(self.g_attribute, {})
+        return store.setdefault(self.namespace, {})
+
+    def load(self, index, default=None):
+        return self._data.get(index, default)
+
+    def clear(self):
+        g.get(self.g_attribute, {}).pop(self.namespace, None)
+
+    @classmethod
+    def teardown(cls, exc=None):  # pylint: disable=unused-argument
+        g.pop(cls.g_attribute, None)
+
 
 class TTLFileCache(Cache):
     storage_folder = None
@@ -66,7 +104,7 @@ class TTLFileCache(Cache):
         self.storage_folder = storage_folder
         self.prefix = prefix
 
-        if int(default_ttl) > 0:
+        if default_ttl is not None and int(default_ttl) > 0:
             self.default_ttl = int(default_ttl)
 
     @property
@@ -98,7 +136,8 @@ class TTLFileCache(Cache):
         }
 
     def _unwrap(self, data):
-        return (data['data'], data['expires'], (self._now > data['expires']),)
+        expires = datetime.fromisoformat(data['expires']).replace(tzinfo=None)
+        return (data['data'], expires, (self._now > expires),)
 
     def expire(self, index=None):
         if index is not None:
@@ -128,7 +167,7 @@ class TTLFileCache(Cache):
         try:
             return os.remove(self._get_full_path(index))
 
-        except OSError:
+        except OSError as exc:
             logger.exception(exc)
             return False
 
@@ -138,18 +177,345 @@ class TTLFileCache(Cache):
             with open(self._get_full_path(index), 'r', encoding=encoding) as datafile:
                 return self._unwrap(json.load(datafile))
 
+        except FileNotFoundError:
+            logger.debug('Cache miss for %s', index)
+
         except OSError as exc:
             logger.exception(exc)
-            return (None, datetime(1970, 1, 1, 0, 0), True)
+
+        return (None, datetime(1970, 1, 1, 0, 0), True)
 
     def save(self, index, data, *, encoding=None, ttl=None, expire=False):
         encoding = encoding if encoding is not None else 'utf-8'
         try:
             os.makedirs(self._storage_full_path, exist_ok=True)
             with open(self._get_full_path(index), 'w', encoding=encoding) as datafile:
-                json.dump(self._wrap(data, ttl=ttl, expire=expire), datafile)
+                json.dump(self._wrap(data, ttl=ttl, expire=expire), datafile, cls=ExtendedEncoder)
             return True
 
         except OSError as exc:
             logger.exception(exc)
             return False
+
+    def get_many(self, indexes, *, encoding=None):
+        return {index: self.load(index, encoding=encoding) for index in indexes}
+
+    def set_many(self, mapping, *, encoding=None, ttl=None):
+        encoding = encoding if encoding is not None else 'utf-8'
+        try:
+            os.makedirs(self._storage_full_path, exist_ok=True)
+        except OSError as exc:
+            logger.exception(exc)
+            return False
+
+        success = True
+        for index, data in mapping.items():
+            try:
+                with open(self._get_full_path(index), 'w', encoding=encoding) as datafile:
+                    json.dump(self._wrap(data, ttl=ttl), datafile, cls=ExtendedEncoder)
+            except OSError as exc:
+                logger.exception(exc)
+                success = False
+
+        return success
+
+
+class _SharedFile:
+    """
+    The file descriptor, mapping and thread locks for one `SharedMemoryCache` path.
+
+    `fcntl` record locks belong to the process, not to a descriptor, so every instance opened on
+    the same path in a process must share these: otherwise they never exclude each other, and
+    closing any descriptor would drop every lock the process holds on the file.
+    """
+
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path, size, header, geometry):
+        import fcntl  # pylint: disable=import-outside-toplevel
+
+        self.fcntl = fcntl
+        self.path = path
+        self.size = size
+        self.geometry = geometry
+        self.thread_locks = [threading.Lock() for _ in range(min(geometry[0], 64))]
+        self.users = 0
+
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, header.size, 0)
+            try:
+                if os.fstat(self.fd).st_size < size:
+                    os.ftruncate(self.fd, size)
+
+                self.mmap = mmap.mmap(self.fd, size)
+                magic, *existing = header.unpack_from(self.mmap, 0)
+                if magic != SharedMemoryCache.MAGIC:
+                    header.pack_into(self.mmap, 0, SharedMemoryCache.MAGIC, *geometry)
+                elif tuple(existing) != geometry:
+                    self.mmap.close()
+                    raise ValueError(
+                        f'{path} was created with buckets={existing[0]}, ways={existing[1]}, '
+                        f'slot_size={existing[2]}'
+                    )
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, header.size, 0)
+        except BaseException:
+            os.close(self.fd)
+            raise
+
+    @classmethod
+    def acquire(cls, path, size, header, geometry):
+        key = os.path.realpath(path)
+        with cls._registry_lock:
+            shared = cls._registry.get(key)
+            if shared is None:
+                shared = cls._registry[key] = cls(path, size, header, geometry)
+            elif shared.geometry != geometry:
+                raise ValueError(
+                    f'{path} is already open with buckets={shared.geometry[0]}, '
+                    f'ways={shared.geometry[1]}, slot_size={shared.geometry[2]}'
+                )
+            shared.users += 1
+            return shared
+
+    def release(self):
+        with self._registry_lock:
+            self.users -= 1
+            if self.users > 0:
+                return
+
+            self._registry.pop(os.path.realpath(self.path), None)
+            self.mmap.close()
+            os.close(self.fd)
+
+
+class SharedMemoryCache(Cache):
+    """
+    Fixed-size cache in a memory-mapped file, shared by every process that opens the same path.
+
+    The file is a set-associative hash table: each key hashes to one bucket of `ways` fixed-size
+    slots, and each slot holds at most `slot_size` bytes of JSON encoded data. Every bucket has
+    its own lock (an `fcntl` byte-range lock across processes, plus a thread lock within one),
+    so readers and writers only ever contend on the same bucket. When a bucket is full, the entry
+    closest to expiry is evicted. `memoize(cache=...)` namespaces its keys per function; use a
+    distinct `prefix` when calling `load`/`save` directly from several places on one file.
+
+    Only values that survive a JSON round trip unchanged are stored, so a hit returns exactly
+    what a miss did; anything else (tuples, datetimes, non-string dict keys...) is refused by
+    `save` with a warning. Requires `fcntl`, so it is not available on Windows.
+
+    """
+
+    MAGIC = b'FQSMC001'
+    _header = struct.Struct('<8sIII')
+    _slot_header = struct.Struct('<20sdI')
+
+    prefix = None
+    default_ttl = 900
+
+    def __init__(
+        self, path, *, prefix=None, buckets=1024, ways=8, slot_size=1024, default_ttl=None,
+    ):
+        if not path:
+            raise ValueError('path must be a valid file path')
+
+        if slot_size <= self._slot_header.size:
+            raise ValueError(f'slot_size must be larger than {self._slot_header.size}')
+
+        self.path = path
+        self.prefix = prefix
+        self.buckets = int(buckets)
+        self.ways = int(ways)
+        self.slot_size = int(slot_size)
+
+        if default_ttl is not None and int(default_ttl) > 0:
+            self.default_ttl = int(default_ttl)
+
+        self._bucket_size = self.ways * self.slot_size
+        self._size = self._header.size + self.buckets * self._bucket_size
+
+        self._file = _SharedFile.acquire(
+            path, self._size, self._header, (self.buckets, self.ways, self.slot_size),
+        )
+        self._fcntl = self._file.fcntl
+        self._fd = self._file.fd
+        self._mmap = self._file.mmap
+        self._thread_locks = self._file.thread_locks
+
+    def _digest(self, index):
+        return sha1(f'{self.prefix or ""}:{index}'.encode('utf-8')).digest()
+
+    def _bucket_offset(self, digest):
+        bucket = int.from_bytes(digest[:8], 'little') % self.buckets
+        return self._header.size + bucket * self._bucket_size
+
+    def _lock(self, offset, exclusive=False):
+        thread_lock = self._thread_locks[(offset // self._bucket_size) % len(self._thread_locks)]
+        thread_lock.acquire()
+        try:
+            self._fcntl.lockf(
+                self._fd,
+                self._fcntl.LOCK_EX if exclusive else self._fcntl.LOCK_SH,
+                self._bucket_size,
+                offset,
+            )
+        except BaseException:
+            thread_lock.release()
+            raise
+        return thread_lock
+
+    def _unlock(self, offset, thread_lock):
+        self._fcntl.lockf(self._fd, self._fcntl.LOCK_UN, self._bucket_size, offset)
+        thread_lock.release()
+
+    def _find(self, bucket_offset, digest, now):
+        """Return the offset of the live slot holding `digest`, or None."""
+        for way in range(self.ways):
+            offset = bucket_offset + way * self.slot_size
+            key, expires, _ = self._slot_header.unpack_from(self._mmap, offset)
+            if key == digest and expires > now:
+                return offset
+        return None
+
+    def _read(self, offset):
+        _, _, length = self._slot_header.unpack_from(self._mmap, offset)
+        start = offset + self._slot_header.size
+        return json.loads(self._mmap[start:start + length].decode('utf-8'))
+
+    def clear(self):
+        length = self._size - self._header.size
+        for thread_lock in self._thread_locks:
+            thread_lock.acquire()
+        self._fcntl.lockf(self._fd, self._fcntl.LOCK_EX, length, self._header.size)
+        try:
+            self._mmap[self._header.size:self._size] = bytes(length)
+        finally:
+            self._fcntl.lockf(self._fd, self._fcntl.LOCK_UN, length, self._header.size)
+            for thread_lock in self._thread_locks:
+                thread_lock.release()
+
+    def delete(self, index):
+        digest = self._digest(index)
+        bucket_offset = self._bucket_offset(digest)
+        thread_lock = self._lock(bucket_offset, exclusive=True)
+        try:
+            offset = self._find(bucket_offset, digest, time.time())
+            if offset is None:
+                return False
+            self._slot_header.pack_into(self._mmap, offset, bytes(20), 0.0, 0)
+            return True
+        finally:
+            self._unlock(bucket_offset, thread_lock)
+
+    def _encode(self, index, data):
+        try:
+            encoded = json.dumps(data, allow_nan=False)
+        except (TypeError, ValueError):
+            encoded = None
+
+        if encoded is None or json.loads(encoded) != data:
+            logger.warning(
+                'Not caching %s, %s does not survive a JSON round trip', index, type(data).__name__
+            )
+            return None
+
+        payload = encoded.encode('utf-8')
+        if len(payload) > self.slot_size - self._slot_header.size:
+            logger.debug('Not caching %s, %d bytes does not fit in a slot', index, len(payload))
+            return None
+        return payload
+
+    def _store(self, bucket_offset, digest, payload, expires_at, now):
+        """Write `payload` to the key's slot, a dead slot or the bucket's oldest slot."""
+        target = None
+        oldest = None
+        for way in range(self.ways):
+            offset = bucket_offset + way * self.slot_size
+            key, expires, _ = self._slot_header.unpack_from(self._mmap, offset)
+            if key == digest or expires <= now:
+                target = offset
+                if key == digest:
+                    break
+            elif oldest is None or expires < oldest[1]:
+                oldest = (offset, expires)
+
+        if target is None:
+            target = oldest[0]
+
+        start = target + self._slot_header.size
+        self._mmap[start:start + len(payload)] = payload
+        self._slot_header.pack_into(self._mmap, target, digest, expires_at, len(payload))
+
+    def _group_by_bucket(self, indexes):
+        buckets = {}
+        for index in indexes:
+            digest = self._digest(index)
+            buckets.setdefault(self._bucket_offset(digest), []).append((index, digest))
+        return buckets
+
+    def load(self, index):
+        digest = self._digest(index)
+        bucket_offset = self._bucket_offset(digest)
+        thread_lock = self._lock(bucket_offset)
+        try:
+            offset = self._find(bucket_offset, digest, time.time())
+            if offset is None:
+                return None
+            return self._read(offset)
+        finally:
+            self._unlock(bucket_offset, thread_lock)
+
+    def save(self, index, data, *, ttl=None):
+        payload = self._encode(index, data)
+        if payload is None:
+            return False
+
+        digest = self._digest(index)
+        bucket_offset = self._bucket_offset(digest)
+        now = time.time()
+        thread_lock = self._lock(bucket_offset, exclusive=True)
+        try:
+            self._store(bucket_offset, digest, payload, now + (ttl or self.default_ttl), now)
+            return True
+        finally:
+            self._unlock(bucket_offset, thread_lock)
+
+    def get_many(self, indexes):
+        now = time.time()
+        results = {}
+        for bucket_offset, entries in self._group_by_bucket(indexes).items():
+            thread_lock = self._lock(bucket_offset)
+            try:
+                for index, digest in entries:
+                    offset = self._find(bucket_offset, digest, now)
+                    results[index] = None if offset is None else self._read(offset)
+            finally:
+                self._unlock(bucket_offset, thread_lock)
+
+        return results
+
+    def set_many(self, mapping, *, ttl=None):
+        payloads = {}
+        for index, data in mapping.items():
+            payload = self._encode(index, data)
+            if payload is not None:
+                payloads[index] = payload
+
+        now = time.time()
+        expires_at = now + (ttl or self.default_ttl)
+        for bucket_offset, entries in self._group_by_bucket(payloads).items():
+            thread_lock = self._lock(bucket_offset, exclusive=True)
+            try:
+                for index, digest in entries:
+                    self._store(bucket_offset, digest, payloads[index], expires_at, now)
+            finally:
+                self._unlock(bucket_offset, thread_lock)
+
+        return len(payloads) == len(mapping)
+
+    def close(self):
+        if self._file is not None:
+            self._file.release()
+            self._file = None
@@ -26,8 +26,12 @@ except ImportError as exc:
 
 from werkzeug.middleware.proxy_fix import ProxyFix
 
-from .converters import DateConverter
+from .cli import cache_cli
+from .converters import DateConverter, DateRangeConverter
+from .decorators.cache import RequestCache
 from .lib.json import ExtendedEncoder
+from .lib.offload import ProcessOffload
+from .lib.overload import OverloadProtection
 from .utils import forced_relative_redirect
 from .utils.sentry import setup_sentry
 
@@ -117,6 +121,7 @@ def _create_app(
     FlaskDynaconf(app, **dynaconf_kwargs)
 
     app.url_map.converters['date'] = DateConverter
+    app.url_map.converters['date_range'] = DateRangeConverter
 
     app.logger.setLevel(log_level)
     app.logger.propagate = True
@@ -149,6 +154,27 @@ def _create_app(
 
     app.json_encoder = ExtendedEncoder
 
+    app.teardown_request(RequestCache.teardown)
+    app.cli.add_command(cache_cli)
+
+    if app.config.get('OFFLOAD_PROCESSES', False):
+        ProcessOffload(app)
+
+    if app.config.get('OVERLOAD_PROTECTION', False):
+        # Installed inside ProxyFix so that client addresses are already resolved
+        app.wsgi_app = OverloadProtection(
+            app.wsgi_app,
+            max_in_flight=app.config.get('OVERLOAD_MAX_IN_FLIGHT', 0),
+            queue_size=app.config.get('OVERLOAD_QUEUE_SIZE', 0),
+            queue_timeout=app.config.get('OVERLOAD_QUEUE_TIMEOUT', 1.0),
+            rate=app.config.get('OVERLOAD_RATE', 0),
+            burst=app.config.get('OVERLOAD_BURST'),
+            rate_key=app.config.get('OVERLOAD_RATE_KEY', 'client'),
+            exempt_paths=app.config.get('OVERLOAD_EXEMPT_PATHS', ['/health']),
+            retry_after=app.config.get('OVERLOAD_RETRY_AFTER', 1),
+            url_map=app.url_map,
+        )
+
     if app.config.get('NUM_PROXIES'):
         app.wsgi_app = ProxyFix(
             app.wsgi_app,
@@ -21,12 +21,12 @@ class ExtendedEncoder(json.JSONEncoder):
         if isinstance(obj, Version):
             return str(obj)
         if isinstance(obj, uuid.UUID):
-            return unicode(obj)
+            return str(obj)
         if isinstance(obj, enum.Enum):
             return obj.value
         if isinstance(obj, set):
             return list(obj)
         if isinstance(obj, Exception):
-            return unicode(obj)
+            return str(obj)
 
         return super().default(obj)
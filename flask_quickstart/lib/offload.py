@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+import atexit
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import pickle
+import threading
+
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import wraps
+
+from flask import Flask, current_app
+
+from .json import ExtendedEncoder
+
+
+logger = logging.getLogger(__name__)
+
+# The app context pushed in each pool worker, so offloaded code can use `current_app.config`
+_worker_context = None
+
+
+def _init_worker(name, config):
+    global _worker_context  # pylint: disable=global-statement
+    app = Flask(name)
+    app.config.update(config)
+    _worker_context = app.app_context()
+    _worker_context.push()
+
+
+def _call_in_worker(module, qualname, args, kwargs):
+    # An `offload` decorated function resolves to its wrapper, so call the original instead
+    obj = importlib.import_module(module)
+    for attr in qualname.split('.'):
+        obj = getattr(obj, attr)
+    obj = getattr(obj, '__wrapped__', obj)
+
+    return json.dumps(obj(*args, **kwargs), cls=ExtendedEncoder)
+
+
+class ProcessOffload:
+    """
+    Flask extension managing a lazily started `ProcessPoolExecutor` for CPU-bound work.
+
+    Config:
+        OFFLOAD_MAX_WORKERS: pool size, defaults to the number of CPUs
+        OFFLOAD_TIMEOUT: default seconds to wait for a result, None waits forever. A call that
+            times out while running can't be interrupted, so the pool is torn down (its workers
+            terminated, failing any other call in progress with `BrokenProcessPool`) and a fresh
+            one is started on the next call.
+        OFFLOAD_CONFIG_KEYS: config keys copied into the workers, defaults to every picklable one
+        OFFLOAD_START_METHOD: multiprocessing start method, defaults to `forkserver` where
+            available, else `spawn`. Forking the (usually multi-threaded) web worker is unsafe.
+    """
+
+    def __init__(self, app=None):
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.app = app
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['process_offload'] = self
+        atexit.register(self.shutdown)
+
+    def _worker_config(self):
+        keys = self.app.config.get('OFFLOAD_CONFIG_KEYS')
+        if keys is None:
+            keys = list(self.app.config.keys())
+
+        config = {}
+        for key in keys:
+            value = self.app.config.get(key)
+            try:
+                pickle.dumps(value)
+            except Exception:  # pylint: disable=broad-except
+                logger.debug('Not passing unpicklable config %s to offload workers', key)
+                continue
+            config[key] = value
+
+        return config
+
+    @property
+    def executor(self):
+        # A pool inherited through fork belongs to the parent, so start a fresh one
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.app.config.get('OFFLOAD_MAX_WORKERS'),
+                        mp_context=multiprocessing.get_context(self._start_method()),
+                        initializer=_init_worker,
+                        initargs=(self.app.import_name, self._worker_config()),
+                    )
+                    self._pid = os.getpid()
+
+        return self._executor
+
+    def _start_method(self):
+        method = self.app.config.get('OFFLOAD_START_METHOD')
+        if method:
+            return method
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            return 'forkserver'
+        return 'spawn'
+
+    def run(self, func, args=(), kwargs=None, *, timeout=None):
+        """Call module level `func(*args, **kwargs)` in the pool and return its decoded result."""
+        if kwargs is None:
+            kwargs = {}
+        if timeout is None:
+            timeout = self.app.config.get('OFFLOAD_TIMEOUT')
+
+        executor = self.executor
+        future = executor.submit(
+            _call_in_worker, func.__module__, func.__qualname__, args, kwargs,
+        )
+        try:
+            return json.loads(future.result(timeout=timeout))
+        except FutureTimeoutError:
+            if not future.cancel():
+                logger.warning('Offloaded %s timed out, recycling the process pool', func.__name__)
+                self._recycle(executor)
+            raise
+
+    def _recycle(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self._pid = None
+
+        terminate_workers = getattr(executor, 'terminate_workers', None)
+        if terminate_workers is not None:
+            terminate_workers()
+            return
+
+        # Before Python 3.14 there is no public way to stop a running task
+        for process in list((getattr(executor, '_processes', None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=wait)
+            self._executor = None
+            self._pid = None
+
+
+def offload(timeout=None):
+    """
+    Decorator to run a module level function in the app's process pool.
+
+    The return value is serialized with `ExtendedEncoder`, so callers receive plain JSON types.
+    Without an installed `ProcessOffload` extension the function runs inline.
+
+    """
+
+    def decorator(obj):
+        @wraps(obj)
+        def wrapper(*args, **kwargs):
+            extension = current_app.extensions.get('process_offload')
+            if extension is None:
+                current_app.logger.debug(
+                    "Calling %s inline, ProcessOffload is not installed", obj.__name__
+                )
+                return json.loads(json.dumps(obj(*args, **kwargs), cls=ExtendedEncoder))
+
+            return extension.run(wrapper, args, kwargs, timeout=timeout)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+import math
+import threading
+import time
+
+from collections import OrderedDict
+
+from werkzeug.exceptions import HTTPException
+from werkzeug.wrappers import Response
+from werkzeug.wsgi import ClosingIterator
+
+
+class TokenBucket:
+    """
+    Token buckets keyed by an arbitrary string, refilled at `rate` tokens per second.
+
+    At most `max_keys` buckets are kept; the least recently used one is dropped to make room,
+    which at worst hands that key a fresh, full bucket.
+    """
+
+    def __init__(self, rate, *, burst=None, max_keys=10000):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1))
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def consume(self, key):
+        """Take a token for `key`. Returns 0 when allowed, else seconds until a token is free."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+            return 0 if allowed else (1 - tokens) / self.rate
+
+
+class OverloadProtection:
+    """
+    WSGI middleware that sheds load before it reaches the app.
+
+    Requests over the per-client/per-route token bucket get a 429. Once `max_in_flight` requests
+    are being served, up to `queue_size` more wait at most `queue_timeout` seconds for a slot and
+    everything else gets a 503. Both responses carry `Retry-After`. Each of `exempt_paths`
+    exempts that exact path and everything below it (`/health` covers `/health/db`, but not
+    `/healthcheck`). Per-route buckets are keyed on the matched rule when `url_map` is given.
+    """
+
+    def __init__(
+        self, wsgi_app, *,
+        max_in_flight=0,
+        queue_size=0,
+        queue_timeout=1.0,
+        rate=0,
+        burst=None,
+        rate_key='client',
+        exempt_paths=(),
+        retry_after=1,
+        url_map=None,
+    ):
+        if rate_key not in ('client', 'route'):
+            raise ValueError(f'rate_key must be "client" or "route", not {rate_key}')
+
+        self.wsgi_app = wsgi_app
+        self.max_in_flight = int(max_in_flight or 0)
+        self.queue_size = int(queue_size or 0)
+        self.queue_timeout = float(queue_timeout)
+        self.rate_key = rate_key
+        if isinstance(exempt_paths, str):
+            exempt_paths = (exempt_paths,)
+        self.exempt_paths = tuple(path.rstrip('/') or '/' for path in exempt_paths or ())
+        self._exempt_prefixes = tuple(f'{path.rstrip("/")}/' for path in self.exempt_paths)
+        self.retry_after = int(retry_after)
+        self.url_map = url_map
+
+        self._buckets = TokenBucket(rate, burst=burst) if rate else None
+        self._slots = threading.BoundedSemaphore(self.max_in_flight) if self.max_in_flight else None
+        self._waiting = 0
+        self._waiting_lock = threading.Lock()
+
+    def _is_exempt(self, path):
+        return path in self.exempt_paths or path.startswith(self._exempt_prefixes)
+
+    def _bucket_key(self, environ):
+        if self.rate_key == 'client':
+            return environ.get('REMOTE_ADDR', '')
+
+        method = environ.get('REQUEST_METHOD')
+        if self.url_map is None:
+            return f'{method} {environ.get("PATH_INFO")}'
+
+        # Key on the rule rather than the path, so `/users/<id>` is one bucket, not one per user
+        try:
+            rule, _ = self.url_map.bind_to_environ(environ).match(return_rule=True)
+        except HTTPException:
+            return f'{method} <unmatched>'
+        return f'{method} {rule.rule}'
+
+    def _acquire_slot(self):
+        if self._slots.acquire(blocking=False):
+            return True
+
+        with self._waiting_lock:
+            if self._waiting >= self.queue_size:
+                return False
+            self._waiting += 1
+
+        try:
+            return self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._waiting_lock:
+                self._waiting -= 1
+
+    @staticmethod
+    def _reject(status, retry_after):
+        return Response(
+            'Too Many Requests' if status == 429 else 'Service Unavailable',
+            status=status,
+            headers={'Retry-After': str(max(1, math.ceil(retry_after)))},
+        )
+
+    def __call__(self, environ, start_response):
+        if self._is_exempt(environ.get('PATH_INFO', '')):
+            return self.wsgi_app(environ, start_response)
+
+        if self._buckets is not None:
+            wait = self._buckets.consume(self._bucket_key(environ))
+            if wait:
+                return self._reject(429, wait)(environ, start_response)
+
+        if self._slots is None:
+            return self.wsgi_app(environ, start_response)
+
+        if not self._acquire_slot():
+            return self._reject(503, self.retry_after)(environ, start_response)
+
+        try:
+            return ClosingIterator(self.wsgi_app(environ, start_response), self._slots.release)
+        except BaseException:
+            self._slots.release()
+            raise
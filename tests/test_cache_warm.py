@@ -0,0 +1,109 @@
+import pytest
+
+from flask import Flask
+
+from flask_quickstart.cli import cache_cli
+from flask_quickstart.decorators import memoize, ttl_memoize
+
+
+CALLS = []
+
+
+@memoize()
+def local_square(value):
+    CALLS.append(('local', value))
+    return value * value
+
+
+@ttl_memoize(default_ttl=60)
+def file_power(base, exponent=2):
+    CALLS.append(('file', base, exponent))
+    return {'result': base ** exponent}
+
+
+@pytest.fixture
+def app(tmp_path):
+    CALLS.clear()
+    for func in (local_square, file_power):
+        func.__wrapped__.cache = None
+
+    app = Flask(__name__)
+    app.config['CACHE_STORAGE_FOLDER'] = str(tmp_path)
+    app.cli.add_command(cache_cli)
+    return app
+
+
+def test_cache_warm_accepts_explicit_args_and_kwargs(app):
+    with app.app_context():
+        assert file_power.cache_warm([[2], {'args': [3], 'kwargs': {'exponent': 3}}]) == 2
+        assert file_power.cache_warm([[2]]) == 0
+        assert file_power.cache_warm([[2]], force=True) == 1
+
+    assert CALLS == [('file', 2, 2), ('file', 3, 3), ('file', 2, 2)]
+
+
+def test_cache_warm_rejects_ambiguous_dicts(app):
+    with app.app_context(), pytest.raises(ValueError):
+        file_power.cache_warm([{'base': 2}])
+
+
+def test_cli_warms_shared_backends(app):
+    app.config['CACHE_WARM'] = [
+        {'function': 'test_cache_warm:file_power', 'calls': [[2], [3], {'args': [4]}]},
+    ]
+    result = app.test_cli_runner().invoke(args=['cache', 'warm'])
+    assert result.exit_code == 0, result.output
+    assert 'Warmed 3 cache entries across 1 functions' in result.output
+
+    with app.app_context():
+        assert file_power(3) == {'result': 9}
+
+
+def test_cli_skips_process_local_caches(app):
+    app.config['CACHE_WARM'] = [
+        {'function': 'test_cache_warm:local_square', 'calls': [[2]]},
+        {'function': 'test_cache_warm:file_power', 'calls': [[2]]},
+    ]
+    result = app.test_cli_runner().invoke(args=['cache', 'warm'])
+    assert result.exit_code != 0
+    assert 'Skipping test_cache_warm:local_square, Cache only lives in this process' in result.output
+    assert ('local', 2) not in CALLS
+    assert ('file', 2, 2) in CALLS
+
+
+def test_ttl_memoize_cold_call_returns_computed_value(app):
+    with app.app_context():
+        assert file_power(5) == {'result': 25}
+        assert file_power(5) == {'result': 25}
+
+    assert CALLS == [('file', 5, 2)]
+
+
+@ttl_memoize(default_ttl=60)
+def maybe_empty(value):
+    CALLS.append(('empty', value))
+    return {} if value == 0 else {'value': value}
+
+
+def test_ttl_memoize_empty_result_is_returned_and_not_cached(app):
+    maybe_empty.__wrapped__.cache = None
+    with app.app_context():
+        assert maybe_empty(0) == {}
+        assert maybe_empty(0) == {}
+
+    assert CALLS == [('empty', 0), ('empty', 0)]
+
+
+def test_ttl_memoize_failure_without_cache_raises(app):
+    @ttl_memoize(default_ttl=60)
+    def failing():
+        raise RuntimeError('boom')
+
+    with app.app_context(), pytest.raises(RuntimeError):
+        failing()
+
+
+def test_cache_warm_counts_only_stored_entries(app):
+    maybe_empty.__wrapped__.cache = None
+    with app.app_context():
+        assert maybe_empty.cache_warm([[0], [1], [2]]) == 2
@@ -0,0 +1,94 @@
+import enum
+
+from datetime import date
+
+import pytest
+
+from flask import Flask, url_for
+from werkzeug.exceptions import NotFound
+from werkzeug.routing import Map, Rule
+
+from flask_quickstart.converters import DateConverter, DateRangeConverter, setup_enum_converter
+
+
+class Colour(enum.Enum):
+    RED = 1
+    REDDISH = 2
+    BLUE = 3
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.url_map.converters['date'] = DateConverter
+    app.url_map.converters['date_range'] = DateRangeConverter
+    app.url_map.converters['colour'] = setup_enum_converter(Colour)
+
+    @app.route('/colours/<colour:colour>')
+    def colour_view(colour):
+        return colour.name
+
+    @app.route('/days/<date:day>')
+    def day_view(day):
+        return day.isoformat()
+
+    @app.route('/ranges/<date_range:span>')
+    def range_view(span):
+        return f'{span[0].isoformat()}/{span[1].isoformat()}'
+
+    return app
+
+
+def test_enum_regex_rejects_unknown_names_at_match_time():
+    url_map = Map(
+        [Rule('/colours/<colour:colour>', endpoint='colour')],
+        converters={'colour': setup_enum_converter(Colour)},
+    )
+    adapter = url_map.bind('localhost')
+    assert adapter.match('/colours/RED') == ('colour', {'colour': Colour.RED})
+    for path in ('/colours/GREEN', '/colours/red', '/colours/REDDISHX', '/colours/'):
+        with pytest.raises(NotFound):
+            adapter.match(path)
+
+
+def test_enum_longer_member_name_matches(app):
+    client = app.test_client()
+    assert client.get('/colours/RED').data == b'RED'
+    assert client.get('/colours/REDDISH').data == b'REDDISH'
+    assert client.get('/colours/GREEN').status_code == 404
+
+
+def test_enum_converter_requires_an_enum_class():
+    with pytest.raises(ValueError):
+        setup_enum_converter(Colour.RED)
+    with pytest.raises(ValueError):
+        setup_enum_converter(dict)
+
+
+def test_date_parsing(app):
+    client = app.test_client()
+    assert client.get('/days/2020-02-29').data == b'2020-02-29'
+    assert client.get('/days/2021-02-29').status_code == 404
+    assert client.get('/days/2021-13-01').status_code == 404
+    assert client.get('/days/20210101').status_code == 404
+
+
+def test_date_range_parsing(app):
+    client = app.test_client()
+    assert client.get('/ranges/2020-01-01..2020-02-01').data == b'2020-01-01/2020-02-01'
+    assert client.get('/ranges/2020-01-01..2020-01-01').status_code == 200
+    assert client.get('/ranges/2020-03-01..2020-02-01').status_code == 404
+    assert client.get('/ranges/2020-01-01..2020-02-30').status_code == 404
+
+
+def test_url_for_round_trips(app):
+    client = app.test_client()
+    with app.test_request_context():
+        urls = [
+            url_for('colour_view', colour=Colour.REDDISH),
+            url_for('day_view', day=date(2020, 1, 2)),
+            url_for('range_view', span=(date(2020, 1, 1), date(2020, 1, 31))),
+        ]
+
+    assert urls == ['/colours/REDDISH', '/days/2020-01-02', '/ranges/2020-01-01..2020-01-31']
+    assert [client.get(url).status_code for url in urls] == [200, 200, 200]
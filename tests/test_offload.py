@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import uuid
+
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime
+
+import pytest
+
+from flask import Flask, current_app
+
+from flask_quickstart.lib.offload import ProcessOffload, offload
+
+
+@offload()
+def describe(value):
+    return {
+        'pid': os.getpid(),
+        'id': uuid.UUID(int=value),
+        'when': datetime(2020, 1, 1),
+        'setting': current_app.config.get('SETTING'),
+    }
+
+
+# Changed by the tests in this process only, so a forked worker would see the new value
+MARKER = 'module-default'
+
+
+@offload()
+def read_marker():
+    return MARKER
+
+
+@offload()
+def wait_for(value, timeout=None):
+    return {'value': value, 'timeout': timeout}
+
+
+@offload(timeout=0.5)
+def sleepy(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SETTING'] = 'from-parent'
+    app.config['OFFLOAD_MAX_WORKERS'] = 1
+    extension = ProcessOffload(app)
+    yield app
+    extension.shutdown()
+
+
+def test_runs_in_worker_with_config_and_extended_json(app):
+    with app.app_context():
+        result = describe(1)
+
+    assert result['pid'] != os.getpid()
+    assert result['id'] == str(uuid.UUID(int=1))
+    assert result['when'] == '2020-01-01T00:00:00+00:00'
+    assert result['setting'] == 'from-parent'
+
+
+def test_runs_inline_without_extension():
+    app = Flask(__name__)
+    with app.app_context():
+        result = describe(1)
+
+    assert result['pid'] == os.getpid()
+    assert result['id'] == str(uuid.UUID(int=1))
+
+
+def test_pool_starts_lazily_and_restarts_after_shutdown(app):
+    extension = app.extensions['process_offload']
+    assert extension._executor is None  # pylint: disable=protected-access
+
+    with app.app_context():
+        first = describe(1)['pid']
+        extension.shutdown()
+        assert extension._executor is None  # pylint: disable=protected-access
+        assert describe(1)['pid'] != first
+
+
+def test_timeout_frees_the_pool(app):
+    with app.app_context():
+        with pytest.raises(FutureTimeoutError):
+            sleepy(3)
+
+        started = time.monotonic()
+        assert sleepy(0) == 0
+        assert time.monotonic() - started < 2
+
+
+def test_functions_may_take_their_own_timeout_argument(app):
+    with app.app_context():
+        assert wait_for(1, timeout=5) == {'value': 1, 'timeout': 5}
+
+
+def test_workers_are_not_forked_from_the_caller(app, monkeypatch):
+    monkeypatch.setattr(sys.modules[__name__], 'MARKER', 'changed-in-parent')
+    with app.app_context():
+        assert read_marker() == 'module-default'
+
+
+def test_run_calls_undecorated_functions(app):
+    with app.app_context():
+        assert app.extensions['process_offload'].run(os.getpid) != os.getpid()
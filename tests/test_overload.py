@@ -0,0 +1,138 @@
+import threading
+import time
+
+from werkzeug.routing import Map, Rule
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+
+from flask_quickstart.lib.overload import OverloadProtection, TokenBucket
+
+
+def ok_app(environ, start_response):
+    return Response('ok')(environ, start_response)
+
+
+def test_token_bucket_allows_burst_then_reports_wait():
+    bucket = TokenBucket(1, burst=2)
+    assert bucket.consume('a') == 0
+    assert bucket.consume('a') == 0
+    assert 0 < bucket.consume('a') <= 1
+    assert bucket.consume('b') == 0
+
+
+def test_token_bucket_is_bounded_on_allowed_requests():
+    bucket = TokenBucket(1, burst=1, max_keys=10)
+    for client in range(1000):
+        assert bucket.consume(str(client)) == 0
+    assert len(bucket) == 10
+
+
+def test_token_bucket_evicts_least_recently_used():
+    bucket = TokenBucket(1, burst=1, max_keys=2)
+    bucket.consume('a')
+    bucket.consume('b')
+    bucket.consume('a')
+    bucket.consume('c')
+    # `a` was used more recently than `b`, so it kept its empty bucket and `b` starts over
+    assert bucket.consume('a') > 0
+    assert bucket.consume('b') == 0
+
+
+def test_rate_limit_returns_429_with_retry_after():
+    client = Client(OverloadProtection(ok_app, rate=1, burst=1))
+    assert client.get('/').status_code == 200
+    response = client.get('/')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_string_exempt_paths_do_not_disable_protection():
+    client = Client(OverloadProtection(ok_app, rate=1, burst=1, exempt_paths='/health'))
+    statuses = [client.get('/').status_code for _ in range(5)]
+    assert statuses == [200, 429, 429, 429, 429]
+    assert [client.get('/health').status_code for _ in range(3)] == [200, 200, 200]
+
+
+def test_exempt_paths_match_whole_segments():
+    client = Client(OverloadProtection(ok_app, rate=1, burst=1, exempt_paths=['/health/']))
+    assert client.get('/health').status_code == 200
+    assert client.get('/health/db').status_code == 200
+    assert client.get('/healthcheck-admin').status_code == 200
+    assert client.get('/healthcheck-admin').status_code == 429
+
+
+def test_route_buckets_are_keyed_on_rule():
+    url_map = Map([Rule('/users/<int:user_id>', endpoint='user'), Rule('/', endpoint='index')])
+    middleware = OverloadProtection(
+        ok_app, rate=1, burst=1, rate_key='route', url_map=url_map,
+    )
+    client = Client(middleware)
+    assert client.get('/users/1').status_code == 200
+    assert client.get('/users/2').status_code == 429
+    assert client.get('/').status_code == 200
+    assert client.get('/nope').status_code == 200
+    assert client.get('/also-nope').status_code == 429
+    assert len(middleware._buckets) == 3  # pylint: disable=protected-access
+
+
+def test_in_flight_cap_queues_then_sheds():
+    release = threading.Event()
+
+    def slow_app(environ, start_response):
+        release.wait(2)
+        return ok_app(environ, start_response)
+
+    middleware = OverloadProtection(slow_app, max_in_flight=1, queue_size=1, queue_timeout=2)
+    statuses = []
+
+    def request():
+        statuses.append(Client(middleware).get('/', buffered=True).status_code)
+
+    threads = [threading.Thread(target=request) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+
+    # One request is running and one is queued, so the next is shed immediately
+    response = Client(middleware).get('/', buffered=True)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert statuses == [200, 200]
+    assert Client(middleware).get('/', buffered=True).status_code == 200
+
+
+def test_queued_request_times_out():
+    release = threading.Event()
+
+    def slow_app(environ, start_response):
+        release.wait(2)
+        return ok_app(environ, start_response)
+
+    middleware = OverloadProtection(slow_app, max_in_flight=1, queue_size=1, queue_timeout=0.05)
+    thread = threading.Thread(target=lambda: Client(middleware).get('/', buffered=True))
+    thread.start()
+    time.sleep(0.05)
+
+    started = time.monotonic()
+    assert Client(middleware).get('/', buffered=True).status_code == 503
+    assert time.monotonic() - started < 1
+
+    release.set()
+    thread.join()
+
+
+def test_slot_released_when_app_raises():
+    def failing_app(environ, start_response):
+        raise RuntimeError('boom')
+
+    middleware = OverloadProtection(failing_app, max_in_flight=1)
+    for _ in range(3):
+        try:
+            Client(middleware).get('/')
+        except RuntimeError:
+            pass
+    assert middleware._slots.acquire(blocking=False)  # pylint: disable=protected-access
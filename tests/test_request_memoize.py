@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from flask import Flask
+
+from flask_quickstart.decorators import request_memoize
+from flask_quickstart.decorators.cache import RequestCache
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.teardown_request(RequestCache.teardown)
+    return app
+
+
+def test_computes_once_per_request(app):
+    calls = []
+
+    @request_memoize
+    def lookup(value):
+        calls.append(value)
+        return value * 2
+
+    @app.route('/')
+    def view():
+        return str([lookup(1), lookup(1), lookup(2)])
+
+    client = app.test_client()
+    assert client.get('/').data == b'[2, 2, 4]'
+    assert client.get('/').data == b'[2, 2, 4]'
+    assert calls == [1, 2, 1, 2]
+
+
+def test_caches_none_results(app):
+    calls = []
+
+    @request_memoize
+    def lookup():
+        calls.append(None)
+
+    with app.test_request_context():
+        lookup()
+        lookup()
+
+    assert len(calls) == 1
+
+
+def test_outside_request_always_calls(app):
+    calls = []
+
+    @request_memoize
+    def lookup():
+        calls.append(None)
+
+    with app.app_context():
+        lookup()
+        lookup()
+
+    assert len(calls) == 2
+
+
+def test_async_concurrent_calls_share_one_task(app):
+    pytest.importorskip('asgiref')
+    calls = []
+
+    @request_memoize
+    async def lookup(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    @app.route('/')
+    async def view():
+        return str(await asyncio.gather(lookup(1), lookup(1), lookup(2)))
+
+    assert app.test_client().get('/').data == b'[2, 2, 4]'
+    assert calls == [1, 2]
+
+
+def test_async_failure_is_retried(app):
+    pytest.importorskip('asgiref')
+    calls = []
+
+    @request_memoize
+    async def lookup():
+        calls.append(None)
+        if len(calls) == 1:
+            raise RuntimeError('boom')
+        return 'ok'
+
+    @app.route('/')
+    async def view():
+        try:
+            await lookup()
+        except RuntimeError:
+            pass
+        return await lookup()
+
+    assert app.test_client().get('/').data == b'ok'
+    assert len(calls) == 2
@@ -0,0 +1,166 @@
+import multiprocessing
+import threading
+import time
+
+from datetime import datetime
+
+import pytest
+
+from flask import Flask
+
+from flask_quickstart.decorators import memoize
+from flask_quickstart.decorators.cache import SharedMemoryCache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'cache.bin')
+
+
+def _child_save(path):
+    SharedMemoryCache(path, buckets=4, ways=2, slot_size=128).save('from-child', [1, 2])
+
+
+def test_save_load_delete_clear(path):
+    cache = SharedMemoryCache(path, buckets=4, ways=2, slot_size=128)
+    assert cache.load('missing') is None
+    assert cache.save('a', {'x': [1, 'two']})
+    assert cache.load('a') == {'x': [1, 'two']}
+    assert cache.delete('a')
+    assert cache.load('a') is None
+
+    cache.save('b', 1)
+    cache.clear()
+    assert cache.load('b') is None
+
+
+def test_ttl_expiry(path):
+    cache = SharedMemoryCache(path, buckets=4, ways=2, slot_size=128)
+    cache.save('a', 1, ttl=0.05)
+    assert cache.load('a') == 1
+    time.sleep(0.1)
+    assert cache.load('a') is None
+
+
+def test_full_bucket_evicts_entry_closest_to_expiry(path):
+    cache = SharedMemoryCache(path, buckets=1, ways=2, slot_size=128)
+    cache.save('short', 1, ttl=10)
+    cache.save('long', 2, ttl=100)
+    cache.save('new', 3, ttl=50)
+    assert cache.get_many(['short', 'long', 'new']) == {'short': None, 'long': 2, 'new': 3}
+
+
+def test_refuses_values_that_do_not_round_trip(path):
+    cache = SharedMemoryCache(path, buckets=4, ways=2, slot_size=128)
+    assert not cache.save('tuple', (1, 2))
+    assert not cache.save('datetime', datetime(2020, 1, 1))
+    assert not cache.save('int-keys', {1: 'a'})
+    assert not cache.save('too-big', 'x' * 200)
+    assert cache.get_many(['tuple', 'datetime', 'int-keys', 'too-big']) == dict.fromkeys(
+        ['tuple', 'datetime', 'int-keys', 'too-big']
+    )
+
+
+def test_set_many_get_many(path):
+    cache = SharedMemoryCache(path, buckets=4, ways=4, slot_size=128)
+    assert cache.set_many({'a': 1, 'b': [2], 'c': {'d': 3}})
+    assert cache.get_many(['a', 'b', 'c', 'z']) == {'a': 1, 'b': [2], 'c': {'d': 3}, 'z': None}
+
+
+def test_prefixes_do_not_collide(path):
+    first = SharedMemoryCache(path, prefix='first', buckets=4, ways=2, slot_size=128)
+    second = SharedMemoryCache(path, prefix='second', buckets=4, ways=2, slot_size=128)
+    first.save('key', 1)
+    second.save('key', 2)
+    assert (first.load('key'), second.load('key')) == (1, 2)
+
+
+def test_instances_on_one_path_share_locks(path):
+    first = SharedMemoryCache(path, prefix='first', buckets=1, ways=2, slot_size=128)
+    second = SharedMemoryCache(path, prefix='second', buckets=1, ways=2, slot_size=128)
+    assert first._file is second._file  # pylint: disable=protected-access
+
+    offset = first._bucket_offset(first._digest('key'))  # pylint: disable=protected-access
+    held = first._lock(offset, exclusive=True)  # pylint: disable=protected-access
+    acquired = threading.Event()
+
+    def take_lock():
+        lock = second._lock(offset, exclusive=True)  # pylint: disable=protected-access
+        acquired.set()
+        second._unlock(offset, lock)  # pylint: disable=protected-access
+
+    thread = threading.Thread(target=take_lock)
+    thread.start()
+    assert not acquired.wait(0.1)
+    first._unlock(offset, held)  # pylint: disable=protected-access
+    assert acquired.wait(1)
+    thread.join()
+
+
+def test_concurrent_writers_keep_bucket_consistent(path):
+    caches = [
+        SharedMemoryCache(path, prefix=str(i), buckets=1, ways=4, slot_size=256) for i in range(4)
+    ]
+
+    def write(cache, worker):
+        for i in range(200):
+            value = {'worker': worker, 'i': i, 'pad': 'x' * (i % 50)}
+            cache.save('key', value)
+            loaded = cache.load('key')
+            assert loaded is None or loaded['worker'] == worker
+
+    threads = [threading.Thread(target=write, args=(cache, i)) for i, cache in enumerate(caches)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for worker, cache in enumerate(caches):
+        assert cache.load('key') == {'worker': worker, 'i': 199, 'pad': 'x' * 49}
+
+
+def test_close_keeps_other_instances_working(path):
+    first = SharedMemoryCache(path, buckets=4, ways=2, slot_size=128)
+    second = SharedMemoryCache(path, buckets=4, ways=2, slot_size=128)
+    first.save('a', 1)
+    first.close()
+    assert second.load('a') == 1
+    second.close()
+
+    reopened = SharedMemoryCache(path, buckets=4, ways=2, slot_size=128)
+    assert reopened.load('a') == 1
+    reopened.close()
+
+
+def test_geometry_mismatch_is_rejected(path):
+    SharedMemoryCache(path, buckets=4, ways=2, slot_size=128)
+    with pytest.raises(ValueError):
+        SharedMemoryCache(path, buckets=8, ways=2, slot_size=128)
+
+
+def test_shared_across_processes(path):
+    cache = SharedMemoryCache(path, buckets=4, ways=2, slot_size=128)
+    process = multiprocessing.get_context('spawn').Process(target=_child_save, args=(path,))
+    process.start()
+    process.join(10)
+    assert process.exitcode == 0
+    assert cache.load('from-child') == [1, 2]
+
+
+def test_memoized_functions_sharing_a_cache_do_not_collide(path):
+    cache = SharedMemoryCache(path, buckets=4, ways=4, slot_size=128)
+
+    @memoize(cache=cache)
+    def user_name(user_id):
+        return f'user-{user_id}'
+
+    @memoize(cache=cache)
+    def user_email(user_id):
+        return f'user-{user_id}@example.com'
+
+    with Flask(__name__).app_context():
+        assert user_name(1) == 'user-1'
+        assert user_email(1) == 'user-1@example.com'
+        assert user_name(1) == 'user-1'
+        assert user_email.cache_warm([[2]]) == 1
+        assert user_name(2) == 'user-2'